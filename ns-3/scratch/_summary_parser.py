@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Shared parser for hd_runner summary.txt files
+
+Single implementation used by run_matrix.py and generate_manifest.py, so
+the prefix tokens live in module constants and the parse function is
+compiled exactly once.
+
+Newer hd_runner builds write a machine-readable summary.json next to
+summary.txt; when present it is loaded directly and the text parser is
+only the fallback for old run directories.
+"""
+
+import os
+
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+# Prefix tokens matched against each stripped line
+_COMPLETED = "Completed:"
+_NS_HDR = "Latency (ns):"
+_US_HDR = "Latency (μs):"
+_P = ("p50:", "p95:", "p99:")
+
+# All three percentile tokens are 4 chars, so a slice + dict lookup
+# replaces the p50/p95/p99 elif chain
+_P_INDEX = {_P[0]: 0, _P[1]: 1, _P[2]: 2}
+
+_ALL_FOUND = 0b1111
+
+def parse_summary(summary_path):
+    """Parse run stats -> (p50_ns, p95_ns, p99_ns, completed)
+
+    Prefers the summary.json written by hd_runner alongside summary.txt;
+    falls back to a single-pass parse of the text report.
+    """
+    json_path = os.path.join(os.path.dirname(summary_path), "summary.json")
+    try:
+        with open(json_path, 'rb') as f:
+            s = _json.loads(f.read())
+        return int(s["p50_ns"]), int(s["p95_ns"]), int(s["p99_ns"]), int(s["completed"])
+    except (OSError, KeyError, ValueError):
+        pass
+
+    stats = [0, 0, 0]  # p50, p95, p99
+    completed = 0
+    found = 0  # bitmask: 1=completed, 2=p50, 4=p95, 8=p99
+
+    with open(summary_path, 'r') as f:
+        in_ns_section = False
+        for raw in f:
+            line = raw.strip()
+            if line.startswith(_COMPLETED):
+                completed = int(line.partition(':')[2].strip().partition('/')[0])
+                found |= 1
+            elif line.startswith(_NS_HDR):
+                in_ns_section = True
+            elif line.startswith(_US_HDR):
+                in_ns_section = False
+            elif in_ns_section:
+                idx = _P_INDEX.get(line[:4])
+                if idx is not None:
+                    # The ns values are integer-valued: parse straight to
+                    # int (dropping any decimal tail) instead of routing
+                    # through an intermediate float
+                    tail = line.partition(':')[2].strip()
+                    stats[idx] = int(tail.split('.', 1)[0])
+                    found |= 2 << idx
+
+            if found == _ALL_FOUND:
+                break
+
+    return stats[0], stats[1], stats[2], completed
@@ -3,68 +3,45 @@
 Generate manifest.csv from completed runs
 """
 
+import io
 import os
 import csv
-import json
+import operator
+import sys
+
+try:
+    import orjson as _json  # 2-3x faster on small dicts; optional
+except ImportError:
+    import json as _json
+
+from _summary_parser import parse_summary
 
 OUT_DIR = "../out/sim"
 
 def parse_config(config_path):
     """Parse config.json file"""
-    with open(config_path, 'r') as f:
-        return json.load(f)
-
-def parse_summary(summary_path):
-    """Parse summary.txt file"""
-    p50 = p95 = p99 = completed = 0
-
-    with open(summary_path, 'r') as f:
-        content = f.read()
-
-        # Parse completed count
-        for line in content.split('\n'):
-            if 'Completed:' in line:
-                completed = int(line.split(':')[1].strip().split('/')[0])
-
-        # Parse latency stats (in ns)
-        in_ns_section = False
-        for line in content.split('\n'):
-            if 'Latency (ns):' in line:
-                in_ns_section = True
-            elif 'Latency (μs):' in line:
-                in_ns_section = False
-            elif in_ns_section:
-                if 'p50:' in line:
-                    p50 = int(float(line.split(':')[1].strip()))
-                elif 'p95:' in line:
-                    p95 = int(float(line.split(':')[1].strip()))
-                elif 'p99:' in line:
-                    p99 = int(float(line.split(':')[1].strip()))
-
-    return p50, p95, p99, completed
+    # Binary read: orjson decodes UTF-8 internally, stdlib json accepts bytes too
+    with open(config_path, 'rb') as f:
+        return _json.loads(f.read())
 
 def main():
     results = []
 
-    # Find all run directories
-    for run_dir in sorted(os.listdir(OUT_DIR)):
-        run_path = os.path.join(OUT_DIR, run_dir)
+    # Find all run directories in one scandir pass; DirEntry caches the
+    # stat info from the directory read, so is_dir() costs no extra syscall
+    with os.scandir(OUT_DIR) as it:
+        entries = sorted(it, key=lambda e: e.name)
 
-        if not os.path.isdir(run_path):
+    for entry in entries:
+        if not entry.is_dir(follow_symlinks=False):
             continue
 
-        config_path = os.path.join(run_path, "config.json")
-        summary_path = os.path.join(run_path, "summary.txt")
-
-        if not os.path.exists(config_path) or not os.path.exists(summary_path):
-            print(f"Skipping {run_dir}: missing files")
-            continue
+        config_path = entry.path + "/config.json"
+        summary_path = entry.path + "/summary.txt"
 
         try:
-            # Parse config
+            # Parse config and summary (EAFP: just open, no exists() pre-check)
             config = parse_config(config_path)
-
-            # Parse summary
             p50, p95, p99, completed = parse_summary(summary_path)
 
             # Add to results
@@ -82,13 +59,16 @@ def main():
                 "p95_ns": p95,
                 "p99_ns": p99,
                 "completed": completed,
-                "out_dir": run_path,
+                "out_dir": entry.path,
             })
 
-            print(f"✓ Processed {run_dir}")
+            print(f"✓ Processed {entry.name}")
+
+        except FileNotFoundError:
+            print(f"Skipping {entry.name}: missing files")
 
         except Exception as e:
-            print(f"Error processing {run_dir}: {e}")
+            print(f"Error processing {entry.name}: {e}")
 
     # Write manifest
     manifest_path = os.path.join(OUT_DIR, "manifest.csv")
@@ -110,24 +90,31 @@ def main():
         "out_dir",
     ]
 
+    # Positional csv.writer + itemgetter avoids DictWriter's per-field
+    # dict.get on every row
+    get_row = operator.itemgetter(*fieldnames)
+
     with open(manifest_path, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(results)
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        writer.writerows(get_row(r) for r in results)
 
     print(f"\n✓ Manifest written to: {manifest_path}")
     print(f"  Total runs: {len(results)}")
 
-    # Print summary table
-    print("\nResults Summary:")
-    print("-" * 80)
-    print(f"{'Workload':<10} {'Out':<5} {'Size':<8} {'p50(μs)':<10} {'p95(μs)':<10} {'p99(μs)':<10}")
-    print("-" * 80)
+    # Print summary table: build it in one buffer and emit with a single
+    # stdout write instead of a print (lock + flush) per row
+    fmt = "{:<10} {:<5} {:<8} {:<10.2f} {:<10.2f} {:<10.2f}\n"
+    buf = io.StringIO()
+    buf.write("\nResults Summary:\n")
+    buf.write("-" * 80 + "\n")
+    buf.write(f"{'Workload':<10} {'Out':<5} {'Size':<8} {'p50(μs)':<10} {'p95(μs)':<10} {'p99(μs)':<10}\n")
+    buf.write("-" * 80 + "\n")
     for r in results:
-        size_str = f"{r['req_bytes']}B"
-        print(f"{r['workload']:<10} {r['outstanding']:<5} {size_str:<8} "
-              f"{r['p50_ns']/1000:<10.2f} {r['p95_ns']/1000:<10.2f} {r['p99_ns']/1000:<10.2f}")
-    print("-" * 80)
+        buf.write(fmt.format(r["workload"], r["outstanding"], f"{r['req_bytes']}B",
+                             r["p50_ns"] / 1000, r["p95_ns"] / 1000, r["p99_ns"] / 1000))
+    buf.write("-" * 80 + "\n")
+    sys.stdout.write(buf.getvalue())
 
 if __name__ == "__main__":
     main()
@@ -252,6 +252,31 @@ WriteConfigLog()
     NS_LOG_INFO("Wrote config to config.json");
 }
 
+void
+WriteSummaryJson(double p50, double p95, double p99)
+{
+    // Machine-readable companion to summary.txt so the orchestrator can
+    // json.load the stats instead of grepping the text report
+    std::string path = g_config.fullOutDir + "/summary.json";
+    std::ofstream ofs(path);
+
+    if (!ofs.is_open())
+    {
+        NS_LOG_ERROR("Failed to open summary.json for writing");
+        return;
+    }
+
+    ofs << "{\n";
+    ofs << "  \"p50_ns\": " << std::fixed << std::setprecision(0) << p50 << ",\n";
+    ofs << "  \"p95_ns\": " << std::fixed << std::setprecision(0) << p95 << ",\n";
+    ofs << "  \"p99_ns\": " << std::fixed << std::setprecision(0) << p99 << ",\n";
+    ofs << "  \"completed\": " << g_completedRequests << "\n";
+    ofs << "}\n";
+
+    ofs.close();
+    NS_LOG_INFO("Wrote summary to summary.json");
+}
+
 void
 WriteSummary()
 {
@@ -313,6 +338,8 @@ WriteSummary()
     ofs.close();
     NS_LOG_INFO("Wrote summary to summary.txt");
 
+    WriteSummaryJson(p50, p95, p99);
+
     // Also print to console
     std::cout << "\n=== Summary ===\n";
     std::cout << "Completed: " << g_completedRequests << "/" << g_config.nReq << "\n";
@@ -14,12 +14,23 @@ Baseline matrix:
 Total: 2 (workloads) × 3 (outstanding) × 3 (sizes) = 18 runs
 """
 
+import argparse
+import concurrent.futures
+import fcntl
+import io
+import itertools
+import operator
 import os
+import re
 import subprocess
 import sys
 import csv
 import json
+import threading
 import time
+from dataclasses import dataclass
+
+from _summary_parser import parse_summary
 
 # Configuration
 NS3_ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -44,58 +55,150 @@ SIZES = [
 # Number of requests per run
 N_REQ = 10000
 
+# Fixed portion of the hd_runner invocation, interpolated once at import;
+# run_experiment appends only the per-cell args. Note: the ns3 script
+# requires a "--" separator between its own args and the program args.
+_CMD_TEMPLATE = (
+    NS3_BIN,
+    "run",
+    "hd_runner",
+    "--",
+    f"--linkRate={LINK_RATE}",
+    f"--linkDelay={LINK_DELAY}",
+    f"--mtu={MTU}",
+    f"--qdisc={QDISC}",
+    f"--nReq={N_REQ}",
+    "--enableEgressHook=1",
+    "--enableIngressHook=1",
+    f"--outDir={OUT_DIR}",
+)
+
+# Parallelism: each run is an independent ns-3 process, so threads are fine
+# (subprocess.run releases the GIL while waiting on the child)
+MAX_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+# Serializes progress output so parallel runs don't interleave their prints
+_print_lock = threading.Lock()
+
+# Compiled once: jump straight to the two interesting lines in the child's
+# stdout instead of scanning every line in Python. Bytes patterns so the
+# raw pipe output never needs a wholesale UTF-8 decode.
+_RE_RUNID = re.compile(rb'Run ID:\s*(\S+)', re.M)
+_RE_OUT = re.compile(rb'Results written to:\s*(.+)$', re.M)
+
+def make_run_id(workload, outstanding, req_bytes, rsp_bytes):
+    """Deterministic run ID: the same matrix cell always maps to the same dir"""
+    return f"{workload}_out{outstanding}_req{req_bytes}_rsp{rsp_bytes}"
+
+def load_cached_result(workload, outstanding, req_bytes, rsp_bytes, run_id, out_path):
+    """Return the RunResult for an already-completed run, or None"""
+    summary_path = os.path.join(out_path, "summary.txt")
+    if not os.path.exists(summary_path):
+        return None
+
+    p50, p95, p99, completed = extract_stats(summary_path)
+    if completed == 0:
+        return None
+
+    return RunResult(
+        run_id=run_id,
+        workload=workload,
+        outstanding=outstanding,
+        req_bytes=req_bytes,
+        rsp_bytes=rsp_bytes,
+        linkRate=LINK_RATE,
+        linkDelay=LINK_DELAY,
+        mtu=MTU,
+        qdisc=QDISC,
+        p50_ns=p50,
+        p95_ns=p95,
+        p99_ns=p99,
+        completed=completed,
+        elapsed_s="0.0",
+        out_dir=out_path,
+    )
+
 def run_experiment(workload, outstanding, req_bytes, rsp_bytes, run_num, total_runs):
-    """Run a single experiment"""
-    print(f"\n{'='*70}")
-    print(f"Run {run_num}/{total_runs}: {workload}, out={outstanding}, req/rsp={req_bytes}B")
-    print(f"{'='*70}")
-
-    # Build command - note: ns3 script requires "--" separator between ns3 args and program args
-    cmd = [
-        NS3_BIN,
-        "run",
-        "hd_runner",
-        "--",
-        f"--linkRate={LINK_RATE}",
-        f"--linkDelay={LINK_DELAY}",
-        f"--mtu={MTU}",
-        f"--qdisc={QDISC}",
+    """Run a single experiment (or reuse its cached output dir)"""
+    run_id = make_run_id(workload, outstanding, req_bytes, rsp_bytes)
+    out_path = os.path.join(OUT_DIR, run_id)
+
+    # Idempotency: if a previous (possibly interrupted) sweep already
+    # completed this cell, re-parse its summary instead of re-simulating
+    cached = load_cached_result(workload, outstanding, req_bytes, rsp_bytes, run_id, out_path)
+    if cached:
+        with _print_lock:
+            print(f"\nRun {run_num}/{total_runs}: {workload}, out={outstanding}, "
+                  f"req/rsp={req_bytes}B — cached ({run_id})")
+        return cached
+
+    # Cross-orchestrator exclusion: on a shared OUT_DIR (e.g. NFS) only one
+    # worker may simulate a given cell; everyone else skips it
+    lock_file = open(os.path.join(OUT_DIR, run_id + ".lock"), 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        with _print_lock:
+            print(f"\nRun {run_num}/{total_runs}: {run_id} held by another worker, skipping")
+        return None
+
+    with _print_lock:
+        print(f"\n{'='*70}")
+        print(f"Run {run_num}/{total_runs}: {workload}, out={outstanding}, req/rsp={req_bytes}B")
+        print(f"{'='*70}")
+
+    # Constant args live in the template; only the per-cell tail is built here
+    cmd = list(_CMD_TEMPLATE) + [
         f"--workload={workload}",
-        f"--nReq={N_REQ}",
         f"--outstanding={outstanding}",
         f"--reqBytes={req_bytes}",
         f"--rspBytes={rsp_bytes}",
-        "--enableEgressHook=1",
-        "--enableIngressHook=1",
-        "--runId=auto",
-        f"--outDir={OUT_DIR}",
+        f"--runId={run_id}",
     ]
 
-    print(f"Command: {' '.join(cmd)}")
+    with _print_lock:
+        print(f"Command: {' '.join(cmd)}")
+
+    # Pipe the child's (potentially multi-MB) output to a log file instead
+    # of buffering it all into a Python string just to grep two lines
+    ns3_cwd = NS3_ROOT + "/.."
+    log_path = os.path.join(ns3_cwd, out_path, "ns3.log")
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
 
     # Run experiment
     start_time = time.time()
     try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True, cwd=NS3_ROOT + "/..")
-        elapsed = time.time() - start_time
+        with open(log_path, 'wb') as log:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    cwd=ns3_cwd)
+
+            # Stream the child's output: tee each raw line to the log and
+            # pick the run id / output path out as they appear, rather than
+            # blocking until exit and scanning the log afterwards. The pipe
+            # stays in bytes mode so only the two matched slices are ever
+            # UTF-8 decoded, not the whole (potentially multi-MB) log.
+            for line in proc.stdout:
+                log.write(line)
+                m = _RE_RUNID.search(line)
+                if m:
+                    run_id = m.group(1).decode('utf-8', 'replace')
+                    continue
+                m = _RE_OUT.search(line)
+                if m:
+                    out_path = m.group(1).strip().decode('utf-8', 'replace')
+
+            returncode = proc.wait()
 
-        # Extract run ID from output
-        run_id = None
-        out_path = None
-        for line in result.stdout.split('\n'):
-            if 'Run ID:' in line:
-                run_id = line.split('Run ID:')[1].strip()
-            elif 'Results written to:' in line:
-                out_path = line.split('Results written to:')[1].strip()
+        elapsed = time.time() - start_time
 
-        if not run_id or not out_path:
-            print("Warning: Could not extract run ID from output")
-            print(result.stdout)
-            return None
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, cmd)
 
-        print(f"✓ Run completed in {elapsed:.1f}s")
-        print(f"  Run ID: {run_id}")
-        print(f"  Output: {out_path}")
+        with _print_lock:
+            print(f"✓ Run completed in {elapsed:.1f}s")
+            print(f"  Run ID: {run_id}")
+            print(f"  Output: {out_path}")
 
         # Read summary stats
         config_path = os.path.join(out_path, "config.json")
@@ -103,126 +206,173 @@ def run_experiment(workload, outstanding, req_bytes, rsp_bytes, run_num, total_r
 
         p50, p95, p99, completed = extract_stats(summary_path)
 
-        return {
-            "run_id": run_id,
-            "workload": workload,
-            "outstanding": outstanding,
-            "req_bytes": req_bytes,
-            "rsp_bytes": rsp_bytes,
-            "linkRate": LINK_RATE,
-            "linkDelay": LINK_DELAY,
-            "mtu": MTU,
-            "qdisc": QDISC,
-            "p50_ns": p50,
-            "p95_ns": p95,
-            "p99_ns": p99,
-            "completed": completed,
-            "out_dir": out_path,
-            "elapsed_s": f"{elapsed:.1f}",
-        }
+        return RunResult(
+            run_id=run_id,
+            workload=workload,
+            outstanding=outstanding,
+            req_bytes=req_bytes,
+            rsp_bytes=rsp_bytes,
+            linkRate=LINK_RATE,
+            linkDelay=LINK_DELAY,
+            mtu=MTU,
+            qdisc=QDISC,
+            p50_ns=p50,
+            p95_ns=p95,
+            p99_ns=p99,
+            completed=completed,
+            elapsed_s=f"{elapsed:.1f}",
+            out_dir=out_path,
+        )
 
     except subprocess.CalledProcessError as e:
-        print(f"✗ Run failed!")
-        print(f"  Error: {e}")
-        print(f"  Stdout: {e.stdout}")
-        print(f"  Stderr: {e.stderr}")
+        with _print_lock:
+            print(f"✗ Run failed!")
+            print(f"  Error: {e}")
+            print(f"  Log: {log_path}")
         return None
 
+    finally:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+def submit_run(params):
+    """Unpack one matrix cell and run it (pool worker entry point)"""
+    workload, outstanding, (req_bytes, rsp_bytes), run_num, total_runs = params
+    return run_experiment(workload, outstanding, req_bytes, rsp_bytes, run_num, total_runs)
+
 def extract_stats(summary_path):
     """Extract p50/p95/p99 and completed count from summary.txt"""
-    p50 = p95 = p99 = completed = 0
-
     try:
-        with open(summary_path, 'r') as f:
-            content = f.read()
-
-            # Parse completed count
-            for line in content.split('\n'):
-                if 'Completed:' in line:
-                    completed = int(line.split(':')[1].strip().split('/')[0])
-
-            # Parse latency stats (in ns)
-            in_ns_section = False
-            for line in content.split('\n'):
-                if 'Latency (ns):' in line:
-                    in_ns_section = True
-                elif 'Latency (μs):' in line:
-                    in_ns_section = False
-                elif in_ns_section:
-                    if 'p50:' in line:
-                        p50 = int(float(line.split(':')[1].strip()))
-                    elif 'p95:' in line:
-                        p95 = int(float(line.split(':')[1].strip()))
-                    elif 'p99:' in line:
-                        p99 = int(float(line.split(':')[1].strip()))
-
+        return parse_summary(summary_path)
     except Exception as e:
         print(f"Warning: Could not parse summary file: {e}")
+        return 0, 0, 0, 0
+
+@dataclass(slots=True)
+class RunResult:
+    """One completed matrix cell; field order matches the manifest columns"""
+    run_id: str
+    workload: str
+    outstanding: int
+    req_bytes: int
+    rsp_bytes: int
+    linkRate: str
+    linkDelay: str
+    mtu: int
+    qdisc: str
+    p50_ns: int
+    p95_ns: int
+    p99_ns: int
+    completed: int
+    elapsed_s: str
+    out_dir: str
+
+# Manifest schema
+MANIFEST_FIELDS = [f for f in RunResult.__dataclass_fields__]
+
+# Positional csv.writer + attrgetter avoids per-field Python-level
+# attribute lookups on every row
+_get_row = operator.attrgetter(*MANIFEST_FIELDS)
+
+def parse_args():
+    """Parse CLI flags for parallelism and cluster-scale sharding"""
+    parser = argparse.ArgumentParser(description="CS538 experiment matrix orchestrator")
+    parser.add_argument("--jobs", type=int, default=MAX_WORKERS, metavar="N",
+                        help="parallel ns-3 processes (default: half the cores)")
+    parser.add_argument("--shard", default="0/1", metavar="I/N",
+                        help="run every Nth matrix cell starting at I, e.g. 0/4 ... 3/4 "
+                             "on four nodes sharing one OUT_DIR")
+    parser.add_argument("--matrix-slice", default=":", metavar="START:END",
+                        help="restrict to matrix[START:END] before sharding")
+    args = parser.parse_args()
+
+    if args.jobs < 1:
+        parser.error(f"invalid --jobs {args.jobs}: need at least 1")
+
+    i, _, n = args.shard.partition("/")
+    try:
+        args.shard_index = int(i)
+        args.shard_count = int(n) if n else 1
+    except ValueError:
+        parser.error(f"invalid --shard {args.shard!r}: need integers I/N")
+    if not 0 <= args.shard_index < args.shard_count:
+        parser.error(f"invalid --shard {args.shard!r}: need 0 <= I < N")
+
+    start, sep, end = args.matrix_slice.partition(":")
+    if not sep:
+        parser.error(f"invalid --matrix-slice {args.matrix_slice!r}: need START:END")
+    try:
+        args.slice = slice(int(start) if start else None, int(end) if end else None)
+    except ValueError:
+        parser.error(f"invalid --matrix-slice {args.matrix_slice!r}: need integer bounds")
 
-    return p50, p95, p99, completed
-
-def write_manifest(results):
-    """Write manifest.csv with all run results"""
-    manifest_path = os.path.join(OUT_DIR, "manifest.csv")
-
-    fieldnames = [
-        "run_id",
-        "workload",
-        "outstanding",
-        "req_bytes",
-        "rsp_bytes",
-        "linkRate",
-        "linkDelay",
-        "mtu",
-        "qdisc",
-        "p50_ns",
-        "p95_ns",
-        "p99_ns",
-        "completed",
-        "elapsed_s",
-        "out_dir",
-    ]
-
-    with open(manifest_path, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(results)
-
-    print(f"\n✓ Manifest written to: {manifest_path}")
+    return args
 
 def main():
+    args = parse_args()
+
     print("CS538 Experiment Matrix Orchestrator")
     print("=" * 70)
 
-    # Calculate total runs
-    total_runs = len(WORKLOADS) * len(OUTSTANDING) * len(SIZES)
-    print(f"Total runs: {total_runs}")
+    # Build the full experiment matrix up front, then narrow to this
+    # worker's share: slice first, then stride across the shards
+    matrix = list(itertools.product(WORKLOADS, OUTSTANDING, SIZES))
+    total_cells = len(matrix)
+    matrix = matrix[args.slice][args.shard_index::args.shard_count]
+    total_runs = len(matrix)
+    print(f"Total runs: {total_runs} (of {total_cells} cells)")
     print(f"  Workloads: {WORKLOADS}")
     print(f"  Outstanding: {OUTSTANDING}")
     print(f"  Sizes: {[f'{s[0]}B' for s in SIZES]}")
+    print(f"  Workers: {args.jobs}")
+    if args.shard_count > 1:
+        print(f"  Shard: {args.shard_index}/{args.shard_count}")
     print()
 
     # Ensure output directory exists
     os.makedirs(OUT_DIR, exist_ok=True)
 
-    # Run all experiments
+    # Run all experiments in parallel (each is an independent ns-3 process);
+    # enumerate over the explicit matrix makes slicing/resume trivial later
+    tasks = [(workload, outstanding, sizes, run_num, total_runs)
+             for run_num, (workload, outstanding, sizes) in enumerate(matrix, 1)]
+
+    # Stream each completed run straight to manifest.csv so a crash or
+    # Ctrl-C mid-matrix doesn't lose the rows that already finished.
+    # The in-memory list is kept only for the final summary table.
+    # Shards write separate manifests so cluster workers don't clobber
+    # each other; generate_manifest.py can merge them afterwards.
+    manifest_name = ("manifest.csv" if args.shard_count == 1
+                     else f"manifest.shard{args.shard_index}.csv")
+    manifest_path = os.path.join(OUT_DIR, manifest_name)
     results = []
-    run_num = 0
 
-    for workload in WORKLOADS:
-        for outstanding in OUTSTANDING:
-            for req_bytes, rsp_bytes in SIZES:
-                run_num += 1
-                result = run_experiment(workload, outstanding, req_bytes, rsp_bytes, run_num, total_runs)
+    with open(manifest_path, 'w', newline='') as mf:
+        writer = csv.writer(mf)
+        writer.writerow(MANIFEST_FIELDS)
+        mf.flush()
 
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as pool:
+            futures = {pool.submit(submit_run, t): t for t in tasks}
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
                 if result:
                     results.append(result)
+                    writer.writerow(_get_row(result))
+                    mf.flush()
+                    os.fsync(mf.fileno())
                 else:
-                    print(f"Warning: Run {run_num} failed, skipping...")
+                    failed_num = futures[future][3]
+                    print(f"Warning: Run {failed_num} failed or was skipped...")
+
+    # Restore matrix order for the summary table (manifest rows are in
+    # completion order; as_completed yields as runs finish)
+    results.sort(key=lambda r: (WORKLOADS.index(r.workload),
+                                OUTSTANDING.index(r.outstanding),
+                                r.req_bytes))
 
-    # Write manifest
     if results:
-        write_manifest(results)
+        print(f"\n✓ Manifest written to: {manifest_path}")
 
         print("\n" + "=" * 70)
         print("Experiment matrix complete!")
@@ -230,16 +380,19 @@ def main():
         print(f"Output directory: {OUT_DIR}")
         print("=" * 70)
 
-        # Print summary table
-        print("\nResults Summary:")
-        print("-" * 70)
-        print(f"{'Workload':<10} {'Out':<5} {'Size':<8} {'p50(μs)':<10} {'p95(μs)':<10} {'p99(μs)':<10}")
-        print("-" * 70)
+        # Print summary table: build it in one buffer and emit with a
+        # single stdout write instead of a print (lock + flush) per row
+        fmt = "{:<10} {:<5} {:<8} {:<10.2f} {:<10.2f} {:<10.2f}\n"
+        buf = io.StringIO()
+        buf.write("\nResults Summary:\n")
+        buf.write("-" * 70 + "\n")
+        buf.write(f"{'Workload':<10} {'Out':<5} {'Size':<8} {'p50(μs)':<10} {'p95(μs)':<10} {'p99(μs)':<10}\n")
+        buf.write("-" * 70 + "\n")
         for r in results:
-            size_str = f"{r['req_bytes']}B"
-            print(f"{r['workload']:<10} {r['outstanding']:<5} {size_str:<8} "
-                  f"{r['p50_ns']/1000:<10.2f} {r['p95_ns']/1000:<10.2f} {r['p99_ns']/1000:<10.2f}")
-        print("-" * 70)
+            buf.write(fmt.format(r.workload, r.outstanding, f"{r.req_bytes}B",
+                                 r.p50_ns / 1000, r.p95_ns / 1000, r.p99_ns / 1000))
+        buf.write("-" * 70 + "\n")
+        sys.stdout.write(buf.getvalue())
 
     else:
         print("\n✗ No successful runs!")